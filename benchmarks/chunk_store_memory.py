@@ -0,0 +1,47 @@
+"""Compare the memory held by a list of Documents against a ChunkStore.
+
+Usage: python -m benchmarks.chunk_store_memory [num_chunks]
+"""
+import sys
+import random
+import tracemalloc
+from langchain.schema import Document
+from src.chunk_store import ChunkStore
+
+def make_chunks(num_chunks, num_files=500, chunk_size=1000):
+    random.seed(0)
+    words = ['policy', 'report', 'section', 'invoice', 'summary', 'contract', 'notes', 'review']
+    sources = [f"/mnt/shared/documents/department_{i % 20}/file_{i:05d}.pdf" for i in range(num_files)]
+    for i in range(num_chunks):
+        text = ' '.join(random.choice(words) for _ in range(chunk_size // 7))[:chunk_size]
+        yield text, sources[i % num_files], i % 40 + 1
+
+def measure(build, num_chunks):
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    result = build(make_chunks(num_chunks))
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return current - baseline
+
+def build_documents(chunks):
+    return [
+        Document(page_content=text, metadata={'source': source, 'page': str(page)})
+        for text, source, page in chunks
+    ]
+
+def build_store(chunks):
+    store = ChunkStore()
+    for text, source, page in chunks:
+        store.append(text, source, page)
+    return store
+
+if __name__ == "__main__":
+    num_chunks = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    documents_bytes = measure(build_documents, num_chunks)
+    store_bytes = measure(build_store, num_chunks)
+    print(f"Chunks: {num_chunks}")
+    print(f"List of Documents: {documents_bytes / 1e6:.1f} MB ({documents_bytes / num_chunks:.0f} bytes/chunk)")
+    print(f"ChunkStore:        {store_bytes / 1e6:.1f} MB ({store_bytes / num_chunks:.0f} bytes/chunk)")
+    print(f"Reduction:         {1 - store_bytes / documents_bytes:.1%}")
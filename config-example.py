@@ -1,6 +1,8 @@
 import os
 
 # Ollama settings
+# Several hosts can be given as a comma-separated string or a list, e.g.
+# 'http://gpu1:11434,http://gpu2:11434'; requests are balanced across them
 OLLAMA_BASE_URL = os.getenv('OLLAMA_BASE_URL', 'http://localhost:11434')
 OLLAMA_MODEL = os.getenv('OLLAMA_MODEL', 'llama3.1:latest')
 OLLAMA_EMBED_MODEL = os.getenv('OLLAMA_EMBED_MODEL', 'mxbai-embed-large')
@@ -15,5 +17,13 @@ DOCUMENT_SOURCE_DIRS = os.getenv('DOCUMENT_SOURCE_DIR', [
 # Database storage location
 DB_STORAGE_DIR = os.getenv('DB_STORAGE_DIR', os.path.expanduser('/path/to/store/database'))
 
+# Index snapshot to import on first start, so new nodes skip re-embedding (optional)
+INDEX_SNAPSHOT_DIR = os.getenv('INDEX_SNAPSHOT_DIR', None)
+
+# Path prefixes to rewrite when importing a snapshot built on another mount point
+INDEX_SNAPSHOT_PATH_MAP = {
+    #'/path/on/snapshot/host': '/path/on/this/host',
+}
+
 # Transcript storage location (optional)
 TRANSCRIPT_DIR = os.getenv('TRANSCRIPT_DIR', os.path.expanduser('/path/to/save/transcripts'))
\ No newline at end of file
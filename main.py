@@ -13,8 +13,14 @@ from src.query_processor import QueryProcessor
 from src.llm_interface import LLMInterface
 from src.citation_manager import CitationManager
 from src.menu import choose_source
+from src.ollama_pool import get_default_pool
+import config
 from config import DOCUMENT_SOURCE_DIRS, DB_STORAGE_DIR, TRANSCRIPT_DIR
 
+# Optional settings that older config.py copies may not define
+INDEX_SNAPSHOT_DIR = getattr(config, 'INDEX_SNAPSHOT_DIR', None)
+INDEX_SNAPSHOT_PATH_MAP = getattr(config, 'INDEX_SNAPSHOT_PATH_MAP', {})
+
 logging.basicConfig(level=logging.ERROR)
 logger = logging.getLogger(__name__)
 
@@ -38,10 +44,20 @@ class DocuChat:
     def setup_rag_system(self):
         logger.info(f"Setting up DocuChat. Using source directories: {DOCUMENT_SOURCE_DIRS}")
         logger.info(f"Database storage directory: {DB_STORAGE_DIR}")
+
+        healthy_hosts = get_default_pool().check_health()
+        logger.info(f"Healthy Ollama hosts: {healthy_hosts}")
+        if not healthy_hosts:
+            print(f"{Fore.YELLOW}No Ollama hosts responded to a health check. Requests will still be attempted.{Style.RESET_ALL}\n")
         
         self.indexer = Indexer()
         self.llm_interface = LLMInterface()
 
+        if INDEX_SNAPSHOT_DIR and not os.path.exists(self.indexer.cache_file):
+            print(f"{Fore.CYAN}Importing index snapshot from {INDEX_SNAPSHOT_DIR}...{Style.RESET_ALL}\n")
+            self.indexer.import_snapshot(INDEX_SNAPSHOT_DIR, path_map=INDEX_SNAPSHOT_PATH_MAP, show_progress=True)
+            logger.info(f"Index snapshot imported from {INDEX_SNAPSHOT_DIR}")
+
         for source_dir in DOCUMENT_SOURCE_DIRS:
             if os.path.isdir(source_dir):
                 print(f"{Fore.CYAN}Analyzing directory contents for {source_dir}...{Style.RESET_ALL}\n")
@@ -53,7 +69,9 @@ class DocuChat:
                 
                 if self.indexer.check_for_changes(files, source_dir):  # Pass both arguments here
                     logger.info(f"Changes detected in documents for {source_dir}. Reprocessing...")
-                    chunks = process_documents(files, show_progress=True)
+                    new_files = self.indexer.link_duplicate_files(files, source_dir)
+                    logger.info(f"{len(files) - len(new_files)} files already indexed, linked without reprocessing")
+                    chunks = process_documents(new_files, show_progress=True)
                     logger.info(f"Processed documents into {len(chunks)} chunks")
                     
                     print(f"\n{Fore.CYAN}Updating index for {source_dir}...{Style.RESET_ALL}\n")
@@ -66,6 +84,12 @@ class DocuChat:
                 logger.error(f"Invalid source directory: {source_dir}")
 
         self.query_processor = QueryProcessor(self.indexer)
+        print(f"{Fore.CYAN}Ollama host stats:{Style.RESET_ALL}")
+        for host_stats in get_default_pool().stats():
+            status = 'healthy' if host_stats['healthy'] else 'unhealthy'
+            print(f"{Fore.CYAN}  {host_stats['url']} ({status}): {host_stats['requests']} requests, "
+                  f"{host_stats['errors']} errors, {host_stats['average_latency'] * 1000:.0f} ms average latency{Style.RESET_ALL}")
+        print()
         logger.info("DocuChat setup complete.")
         print(f"{Fore.GREEN}Setup complete. All source directories processed.{Style.RESET_ALL}\n")
 
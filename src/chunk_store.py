@@ -0,0 +1,96 @@
+from array import array
+from langchain.schema import Document
+
+NO_PAGE = -1
+NO_SOURCE_DIR = -1
+
+class ChunkStore:
+    """Columnar container for document chunks.
+
+    Chunk text lives in one UTF-8 buffer addressed by offsets, source paths
+    and source directories are interned into integer ids, and page numbers
+    are kept in a typed array. Document objects are only created when a
+    chunk is handed to code that expects one.
+    """
+
+    __slots__ = ('_text', '_offsets', '_strings', '_string_ids', '_sources', '_source_dirs', '_pages', '_extra')
+
+    def __init__(self):
+        self._text = bytearray()
+        self._offsets = array('Q', [0])
+        self._strings = []
+        self._string_ids = {}
+        self._sources = array('I')
+        self._source_dirs = array('i')
+        self._pages = array('i')
+        self._extra = {}  # Chunk index -> metadata keys beyond source/page, only for chunks that have any
+
+    @classmethod
+    def from_documents(cls, documents, source_dir=None):
+        store = cls()
+        for document in documents:
+            store.add_document(document, source_dir)
+        return store
+
+    def __len__(self):
+        return len(self._sources)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.to_document(i)
+
+    def _intern(self, value):
+        string_id = self._string_ids.get(value)
+        if string_id is None:
+            string_id = len(self._strings)
+            self._strings.append(value)
+            self._string_ids[value] = string_id
+        return string_id
+
+    def append(self, text, source, page=None, source_dir=None, extra=None):
+        self._text += text.encode('utf-8')
+        self._offsets.append(len(self._text))
+        self._sources.append(self._intern(source))
+        self._source_dirs.append(NO_SOURCE_DIR if source_dir is None else self._intern(source_dir))
+        self._pages.append(NO_PAGE if page is None else int(page))
+        if extra:
+            self._extra[len(self._sources) - 1] = dict(extra)
+
+    def add_document(self, document, source_dir=None):
+        metadata = document.metadata
+        extra = {k: v for k, v in metadata.items() if k not in ('source', 'page', 'source_dir')}
+        self.append(
+            document.page_content,
+            metadata['source'],
+            metadata.get('page'),
+            metadata.get('source_dir', source_dir),
+            extra
+        )
+
+    def text(self, i):
+        return self._text[self._offsets[i]:self._offsets[i + 1]].decode('utf-8')
+
+    def source(self, i):
+        return self._strings[self._sources[i]]
+
+    def source_dir(self, i):
+        string_id = self._source_dirs[i]
+        return None if string_id == NO_SOURCE_DIR else self._strings[string_id]
+
+    def page(self, i):
+        page = self._pages[i]
+        return None if page == NO_PAGE else page
+
+    def metadata(self, i):
+        metadata = dict(self._extra.get(i, ()))
+        metadata['source'] = self.source(i)
+        page = self.page(i)
+        if page is not None:
+            metadata['page'] = str(page)
+        source_dir = self.source_dir(i)
+        if source_dir is not None:
+            metadata['source_dir'] = source_dir
+        return metadata
+
+    def to_document(self, i):
+        return Document(page_content=self.text(i), metadata=self.metadata(i))
@@ -2,6 +2,7 @@ import logging
 from langchain_community.document_loaders import PyPDFLoader, TextLoader, Docx2txtLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from tqdm import tqdm
+from src.chunk_store import ChunkStore
 
 # Configure logging
 logging.basicConfig(level=logging.ERROR)
@@ -29,32 +30,36 @@ def load_document(file_path):
 
 def process_documents(files, show_progress=False):
     logger.info(f"Processing {len(files)} files")
-    documents = []
-    file_iterator = tqdm(files, desc="Processing files", disable=not show_progress)
-    for file in file_iterator:
-        docs = load_document(file)
-        documents.extend(docs)
-    
-    logger.info(f"Total documents loaded: {len(documents)}")
-    
-    if not documents:
-        logger.warning("No documents were successfully loaded. Returning empty list of chunks.")
-        return []
-
     text_splitter = RecursiveCharacterTextSplitter(
         chunk_size=1000,
         chunk_overlap=200,
         length_function=len,
     )
-    
-    chunks = text_splitter.split_documents(documents)
-    
+
+    # Split file by file so only one file's Document objects are alive at a time
+    chunks = ChunkStore()
+    documents_loaded = 0
+    file_iterator = tqdm(files, desc="Processing files", disable=not show_progress)
+    for file in file_iterator:
+        docs = load_document(file)
+        if not docs:
+            continue
+        documents_loaded += len(docs)
+
+        for chunk in text_splitter.split_documents(docs):
+            if 'page' in chunk.metadata:
+                page = int(chunk.metadata['page']) + 1
+            else:
+                page = len(chunks) + 1
+            extra = {k: v for k, v in chunk.metadata.items() if k not in ('source', 'page')}
+            chunks.append(chunk.page_content, chunk.metadata['source'], page, extra=extra)
+
+    logger.info(f"Total documents loaded: {documents_loaded}")
+
+    if not documents_loaded:
+        logger.warning("No documents were successfully loaded. Returning empty list of chunks.")
+        return chunks
+
     logger.info(f"Created {len(chunks)} chunks from the documents")
 
-    for i, chunk in enumerate(chunks):
-        if 'page' in chunk.metadata:
-            chunk.metadata['page'] = str(int(chunk.metadata['page']) + 1)
-        else:
-            chunk.metadata['page'] = str(i + 1)
-    
-    return chunks
\ No newline at end of file
+    return chunks
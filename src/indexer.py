@@ -1,12 +1,16 @@
 import os
-import uuid
+import json
 import logging
 from langchain_chroma import Chroma
 from langchain.embeddings.base import Embeddings
 import requests
 from typing import List
-from config import OLLAMA_BASE_URL, OLLAMA_EMBED_MODEL, DB_STORAGE_DIR
+from concurrent.futures import ThreadPoolExecutor
+from config import OLLAMA_EMBED_MODEL, DB_STORAGE_DIR
+from src.ollama_pool import get_default_pool
+from src.chunk_store import ChunkStore
 import hashlib
+import numpy as np
 from tqdm import tqdm
 import chromadb
 from chromadb.config import Settings
@@ -16,22 +20,126 @@ from chromadb.api.types import Documents, EmbeddingFunction
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Snapshot layout: a directory holding one file per column plus a JSON header
+SNAPSHOT_FORMAT_VERSION = 1
+SNAPSHOT_HEADER_FILE = 'snapshot.json'
+SNAPSHOT_IDS_FILE = 'ids.json'
+SNAPSHOT_METADATAS_FILE = 'metadatas.json'
+SNAPSHOT_TEXT_FILE = 'documents.bin'
+SNAPSHOT_OFFSETS_FILE = 'document_offsets.npy'
+SNAPSHOT_EMBEDDINGS_FILE = 'embeddings.npy'
+SNAPSHOT_DATA_FILES = (
+    SNAPSHOT_IDS_FILE,
+    SNAPSHOT_METADATAS_FILE,
+    SNAPSHOT_TEXT_FILE,
+    SNAPSHOT_OFFSETS_FILE,
+    SNAPSHOT_EMBEDDINGS_FILE,
+)
+SNAPSHOT_BATCH_SIZE = 1000
+
+# Texts per embedding request batch, and chunks handed to Chroma per add call
+EMBED_BATCH_SIZE = 16
+INDEX_BATCH_SIZE = 256
+
+def _sha256_file(file_path):
+    hasher = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+# Chroma metadata cannot hold lists, so membership in each source directory and
+# each source file's content is recorded as a boolean flag key on the chunk
+SOURCE_DIR_KEY_PREFIX = 'in_source_dir_'
+FILE_HASH_KEY_PREFIX = 'has_file_hash_'
+CITATION_KEYS = ('citation_dirs', 'source_paths', 'source_pages', 'source_hashes')
+
+def _source_dir_key(source_dir):
+    return SOURCE_DIR_KEY_PREFIX + hashlib.md5(source_dir.encode('utf-8')).hexdigest()
+
+def _file_hash_key(file_hash):
+    return FILE_HASH_KEY_PREFIX + file_hash
+
+def _chunk_id(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def _citations(metadata):
+    """(source_dir, source_path, page, file_hash) for every file a chunk was found in."""
+    if 'source_paths' in metadata:
+        return list(zip(*(metadata[key].split(os.pathsep) for key in CITATION_KEYS)))
+    if metadata.get('source_dir'):
+        # Chunks indexed before deduplication belong to a single file
+        return [(metadata['source_dir'], metadata.get('source', ''), str(metadata.get('page', '')), '')]
+    return []
+
+def _set_citations(metadata, citations):
+    # One entry per (source_dir, file) pair, kept as parallel strings since metadata cannot hold lists
+    for key, values in zip(CITATION_KEYS, zip(*citations)):
+        metadata[key] = os.pathsep.join(values)
+    source_dirs = list(dict.fromkeys(source_dir for source_dir, _, _, _ in citations))
+    metadata.setdefault('source_dir', source_dirs[0])
+    metadata['source_dirs'] = os.pathsep.join(source_dirs)
+    for source_dir in source_dirs:
+        metadata[_source_dir_key(source_dir)] = True
+    for _, _, _, file_hash in citations:
+        if file_hash:
+            metadata[_file_hash_key(file_hash)] = True
+    return metadata
+
+def _add_citation(metadata, source_dir, source_path, page, file_hash):
+    citations = _citations(metadata)
+    if not any(d == source_dir and p == source_path for d, p, _, _ in citations):
+        citations.append((source_dir, source_path, '' if page is None else str(page), file_hash))
+    return _set_citations(metadata, citations)
+
+def _cite_from(document, source_dir):
+    """Point a search result at the first file in source_dir that contains it."""
+    for d, source_path, page, _ in _citations(document.metadata):
+        if d == source_dir:
+            document.metadata['source'] = source_path
+            if page:
+                document.metadata['page'] = page
+            return
+
+def _remap_path(path, path_map):
+    if not path_map:
+        return path
+    for old_prefix, new_prefix in path_map.items():
+        old_prefix = old_prefix.rstrip('/\\')
+        if path == old_prefix or (path.startswith(old_prefix) and path[len(old_prefix)] in '/\\'):
+            return new_prefix.rstrip('/\\') + path[len(old_prefix):]
+    return path
+
 class OllamaEmbeddings(Embeddings):
-    def __init__(self):
-        self.base_url = OLLAMA_BASE_URL
+    def __init__(self, pool=None):
+        self.pool = pool or get_default_pool()
         self.model = OLLAMA_EMBED_MODEL
 
-    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+    def _embed_batch(self, base_url, texts):
         embeddings = []
         for text in texts:
             response = requests.post(
-                f"{self.base_url}/api/embeddings",
-                json={"model": self.model, "prompt": text}
+                f"{base_url}/api/embeddings",
+                json={"model": self.model, "prompt": text},
+                timeout=self.pool.timeout
             )
             response.raise_for_status()
             embeddings.append(response.json()['embedding'])
         return embeddings
 
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        batches = [texts[i:i + EMBED_BATCH_SIZE] for i in range(0, len(texts), EMBED_BATCH_SIZE)]
+        if len(batches) <= 1 or len(self.pool) == 1:
+            results = [self.pool.request(lambda url, b=batch: self._embed_batch(url, b)) for batch in batches]
+        else:
+            # One worker per host keeps every host busy; the pool picks the least loaded one
+            with ThreadPoolExecutor(max_workers=len(self.pool)) as executor:
+                results = list(executor.map(
+                    lambda batch: self.pool.request(lambda url: self._embed_batch(url, batch)),
+                    batches
+                ))
+        return [embedding for batch in results for embedding in batch]
+
     def embed_query(self, text: str) -> List[float]:
         return self.embed_documents([text])[0]
 
@@ -43,8 +151,8 @@ class OllamaEmbeddingFunction(EmbeddingFunction):
         return self.ollama_embeddings.embed_documents(texts)
 
 class Indexer:
-    def __init__(self):
-        self.embeddings = OllamaEmbeddings()
+    def __init__(self, pool=None):
+        self.embeddings = OllamaEmbeddings(pool)
         self.persist_directory = os.path.join(DB_STORAGE_DIR, 'chroma_db')
         self.cache_file = os.path.join(DB_STORAGE_DIR, 'document_cache.txt')
         self.chroma_settings = Settings(
@@ -62,6 +170,9 @@ class Indexer:
         # Initialize set to keep track of processed files
         self.processed_files = set()
 
+        # File hashes computed during this setup pass, so each file is read only once
+        self.file_hashes = {}
+
     def create_index(self, chunks, source_dir, show_progress=False):
         logger.info(f"Creating index for {source_dir} with {len(chunks)} chunks")
         if not chunks:
@@ -78,12 +189,7 @@ class Indexer:
             )
             
             # Use tqdm for progress bar
-            chunk_iterator = tqdm(chunks, desc=f"Indexing chunks for {source_dir}", disable=not show_progress)
-            for chunk in chunk_iterator:
-                if chunk.metadata['source'] not in self.processed_files:
-                    self._add_chunk_to_collection(chunk, source_dir)
-                    self.processed_files.add(chunk.metadata['source'])
-                    self._update_cache_file(chunk.metadata['source'], source_dir)
+            self._add_new_chunks(chunks, source_dir, show_progress)
             
             logger.info(f"Index created and persisted successfully for {source_dir} at {self.persist_directory}")
             
@@ -106,22 +212,117 @@ class Indexer:
         if self.collection is None:
             self.create_index(new_chunks, source_dir)
         else:
-            for chunk in new_chunks:
-                if chunk.metadata['source'] not in self.processed_files:
-                    self._add_chunk_to_collection(chunk, source_dir)
-                    self.processed_files.add(chunk.metadata['source'])
-                    self._update_cache_file(chunk.metadata['source'], source_dir)
+            self._add_new_chunks(new_chunks, source_dir)
             
             logger.info(f"Index updated and persisted successfully for {source_dir} at {self.persist_directory}")
 
-    def _add_chunk_to_collection(self, chunk, source_dir):
-        metadata = chunk.metadata.copy()
-        metadata['source_dir'] = source_dir
-        self.collection.add(
-            ids=[str(uuid.uuid4())],
-            documents=[chunk.page_content],
-            metadatas=[metadata]
+    def _add_new_chunks(self, chunks, source_dir, show_progress=False):
+        if not isinstance(chunks, ChunkStore):
+            chunks = ChunkStore.from_documents(chunks)
+
+        new_sources = [s for s in dict.fromkeys(chunks.source(i) for i in range(len(chunks))) if s not in self.processed_files]
+        file_hashes = {source: self.get_file_hash(source) for source in new_sources}
+
+        # Identical chunk text maps to the same id, so it is embedded and stored once,
+        # but it keeps the first occurrence from every file it came from for citations
+        pending = {}
+        for i in range(len(chunks)):
+            source = chunks.source(i)
+            if source in file_hashes:
+                occurrences = pending.setdefault(_chunk_id(chunks.text(i)), [])
+                if all(chunks.source(j) != source for j in occurrences):
+                    occurrences.append(i)
+
+        # A file is only recorded as indexed once every batch holding its chunks has been added,
+        # so a failed ingest is retried on the next start
+        outstanding = {}
+        for occurrences in pending.values():
+            for i in occurrences:
+                outstanding[chunks.source(i)] = outstanding.get(chunks.source(i), 0) + 1
+
+        # Adding in batches lets the embedding function spread work across Ollama hosts
+        pending = list(pending.items())
+        batch_iterator = tqdm(range(0, len(pending), INDEX_BATCH_SIZE), desc=f"Indexing chunks for {source_dir}", disable=not show_progress)
+        for start in batch_iterator:
+            batch = pending[start:start + INDEX_BATCH_SIZE]
+            self._add_chunks_to_collection(chunks, batch, source_dir, file_hashes)
+            for _, occurrences in batch:
+                for i in occurrences:
+                    source = chunks.source(i)
+                    outstanding[source] -= 1
+                    if outstanding[source] == 0:
+                        self._record_indexed_file(source, source_dir)
+
+    def _record_indexed_file(self, file_path, source_dir):
+        self.processed_files.add(file_path)
+        self._update_cache_file(file_path, source_dir)
+
+    def _add_chunks_to_collection(self, chunks, items, source_dir, file_hashes):
+        existing = self.collection.get(ids=[chunk_id for chunk_id, _ in items], include=["metadatas"])
+        existing_metadatas = dict(zip(existing['ids'], existing['metadatas']))
+
+        new_ids, new_documents, new_metadatas = [], [], []
+        updated_ids, updated_metadatas = [], []
+        for chunk_id, occurrences in items:
+            if chunk_id in existing_metadatas:
+                metadata = existing_metadatas[chunk_id]
+                updated_ids.append(chunk_id)
+                updated_metadatas.append(metadata)
+            else:
+                metadata = chunks.metadata(occurrences[0])
+                metadata.pop('source_dir', None)
+                new_ids.append(chunk_id)
+                new_documents.append(chunks.text(occurrences[0]))
+                new_metadatas.append(metadata)
+            for i in occurrences:
+                _add_citation(metadata, source_dir, chunks.source(i), chunks.page(i), file_hashes[chunks.source(i)])
+
+        if updated_ids:
+            logger.info(f"Linked {len(updated_ids)} already indexed chunks to {source_dir}")
+            self.collection.update(ids=updated_ids, metadatas=updated_metadatas)
+        if new_ids:
+            self.collection.add(
+                ids=new_ids,
+                documents=new_documents,
+                metadatas=new_metadatas
+            )
+
+    def link_duplicate_files(self, files, source_dir):
+        """Attach source_dir to the chunks of files whose content is already indexed.
+
+        Returns the files that were not found in the index and still need processing.
+        """
+        if not os.path.exists(self.persist_directory):
+            return files
+
+        collection = self.chroma_client.get_or_create_collection(
+            name=self.collection_name,
+            embedding_function=self.chroma_embed_function
         )
+        remaining = []
+        for file_path in files:
+            file_hash = self.get_file_hash(file_path)
+            existing = collection.get(
+                where={_file_hash_key(file_hash): True},
+                include=["metadatas"]
+            )
+            if not existing['ids']:
+                remaining.append(file_path)
+                continue
+
+            # The copy has the same pages as the file already cited under this content hash
+            for metadata in existing['metadatas']:
+                page = next((page for _, _, page, h in _citations(metadata) if h == file_hash), None)
+                _add_citation(metadata, source_dir, file_path, page, file_hash)
+            for start in range(0, len(existing['ids']), INDEX_BATCH_SIZE):
+                collection.update(
+                    ids=existing['ids'][start:start + INDEX_BATCH_SIZE],
+                    metadatas=existing['metadatas'][start:start + INDEX_BATCH_SIZE]
+                )
+            self.processed_files.add(file_path)
+
+        logger.info(f"Linked {len(files) - len(remaining)} duplicate files to {source_dir} without reprocessing")
+        return remaining
 
     def _update_cache_file(self, file_path, source_dir):
         with open(self.cache_file, 'a') as f:
@@ -148,8 +349,13 @@ class Indexer:
         logger.info(f"Performing similarity search for query: {query}")
         
         if source_dir:
-            filter_dict = {"source_dir": source_dir}
-            return self.vector_store.similarity_search(query, k=k, filter=filter_dict)
+            # Chunks indexed before deduplication only carry a single source_dir
+            filter_dict = {"$or": [{"source_dir": source_dir}, {_source_dir_key(source_dir): True}]}
+            results = self.vector_store.similarity_search(query, k=k, filter=filter_dict)
+            # Cite the copy of the file that lives in the selected source
+            for document in results:
+                _cite_from(document, source_dir)
+            return results
         else:
             return self.vector_store.similarity_search(query, k=k)
 
@@ -160,11 +366,13 @@ class Indexer:
                 f.write(f"{source_dir}:{file_path}:{file_hash}\n")
 
     def get_file_hash(self, file_path):
-        hasher = hashlib.md5()
-        with open(file_path, 'rb') as f:
-            buf = f.read()
-            hasher.update(buf)
-        return hasher.hexdigest()
+        if file_path not in self.file_hashes:
+            hasher = hashlib.md5()
+            with open(file_path, 'rb') as f:
+                buf = f.read()
+                hasher.update(buf)
+            self.file_hashes[file_path] = hasher.hexdigest()
+        return self.file_hashes[file_path]
 
     def check_for_changes(self, files, source_dir):
         if not os.path.exists(self.cache_file):
@@ -187,4 +395,195 @@ class Indexer:
             file_path not in cached_hashes or
             current_hashes[file_path] != cached_hashes[file_path]
             for file_path in current_hashes
-        )
\ No newline at end of file
+        )
+
+    def export_snapshot(self, snapshot_dir, show_progress=False):
+        """Write the whole collection, its embeddings and the document cache to snapshot_dir."""
+        logger.info(f"Exporting index snapshot to {snapshot_dir}")
+        if not os.path.exists(self.persist_directory):
+            logger.error("Index has not been created yet")
+            raise ValueError("Index has not been created yet.")
+
+        collection = self.chroma_client.get_collection(
+            name=self.collection_name,
+            embedding_function=self.chroma_embed_function
+        )
+        count = collection.count()
+        if count == 0:
+            raise ValueError("Index is empty. Nothing to export.")
+
+        os.makedirs(snapshot_dir, exist_ok=True)
+        ids = []
+        metadatas = []
+        offsets = np.zeros(count + 1, dtype=np.int64)
+        embeddings = None
+
+        with open(os.path.join(snapshot_dir, SNAPSHOT_TEXT_FILE), 'wb') as text_file:
+            batch_iterator = tqdm(range(0, count, SNAPSHOT_BATCH_SIZE), desc="Exporting snapshot", disable=not show_progress)
+            for start in batch_iterator:
+                batch = collection.get(
+                    limit=SNAPSHOT_BATCH_SIZE,
+                    offset=start,
+                    include=["documents", "metadatas", "embeddings"]
+                )
+                batch_embeddings = np.asarray(batch['embeddings'], dtype=np.float32)
+                if embeddings is None:
+                    # Written straight to disk so the export never holds every vector in memory
+                    embeddings = np.lib.format.open_memmap(
+                        os.path.join(snapshot_dir, SNAPSHOT_EMBEDDINGS_FILE),
+                        mode='w+', dtype=np.float32, shape=(count, batch_embeddings.shape[1])
+                    )
+                embeddings[start:start + len(batch_embeddings)] = batch_embeddings
+
+                for i, document in enumerate(batch['documents']):
+                    encoded = document.encode('utf-8')
+                    text_file.write(encoded)
+                    offsets[start + i + 1] = offsets[start + i] + len(encoded)
+                ids.extend(batch['ids'])
+                metadatas.extend(batch['metadatas'])
+
+        embeddings.flush()
+        dimensions = embeddings.shape[1]
+        del embeddings
+
+        np.save(os.path.join(snapshot_dir, SNAPSHOT_OFFSETS_FILE), offsets)
+        with open(os.path.join(snapshot_dir, SNAPSHOT_IDS_FILE), 'w') as f:
+            json.dump(ids, f)
+        with open(os.path.join(snapshot_dir, SNAPSHOT_METADATAS_FILE), 'w') as f:
+            json.dump(metadatas, f)
+
+        manifest = []
+        if os.path.exists(self.cache_file):
+            with open(self.cache_file, 'r') as f:
+                manifest = [line.strip() for line in f if line.strip()]
+
+        header = {
+            'format_version': SNAPSHOT_FORMAT_VERSION,
+            'embed_model': self.embeddings.model,
+            'count': count,
+            'dimensions': dimensions,
+            'checksums': {name: _sha256_file(os.path.join(snapshot_dir, name)) for name in SNAPSHOT_DATA_FILES},
+            'manifest': manifest,
+        }
+        with open(os.path.join(snapshot_dir, SNAPSHOT_HEADER_FILE), 'w') as f:
+            json.dump(header, f, indent=2)
+
+        logger.info(f"Exported {count} chunks to snapshot at {snapshot_dir}")
+
+    def _read_snapshot_header(self, snapshot_dir):
+        header_path = os.path.join(snapshot_dir, SNAPSHOT_HEADER_FILE)
+        if not os.path.exists(header_path):
+            raise ValueError(f"No snapshot found at {snapshot_dir}")
+
+        with open(header_path, 'r') as f:
+            header = json.load(f)
+
+        if header.get('format_version') != SNAPSHOT_FORMAT_VERSION:
+            raise ValueError(f"Unsupported snapshot format version: {header.get('format_version')}")
+
+        checksums = header.get('checksums', {})
+        missing = [name for name in SNAPSHOT_DATA_FILES if name not in checksums]
+        if missing:
+            raise ValueError(f"Snapshot {snapshot_dir} has no checksum for: {', '.join(missing)}")
+
+        for name in SNAPSHOT_DATA_FILES:
+            expected = checksums[name]
+            actual = _sha256_file(os.path.join(snapshot_dir, name))
+            if actual != expected:
+                raise ValueError(f"Checksum mismatch for {name} in snapshot {snapshot_dir}")
+
+        return header
+
+    def import_snapshot(self, snapshot_dir, path_map=None, show_progress=False):
+        """Load a snapshot written by export_snapshot without re-embedding anything.
+
+        path_map maps path prefixes recorded in the snapshot to the prefixes
+        used on this machine, e.g. {'/mnt/docs': '/data/docs'}.
+        """
+        logger.info(f"Importing index snapshot from {snapshot_dir}")
+        header = self._read_snapshot_header(snapshot_dir)
+
+        if header['embed_model'] != self.embeddings.model:
+            raise ValueError(
+                f"Snapshot was built with embed model {header['embed_model']}, "
+                f"but {self.embeddings.model} is configured."
+            )
+
+        with open(os.path.join(snapshot_dir, SNAPSHOT_IDS_FILE), 'r') as f:
+            ids = json.load(f)
+        with open(os.path.join(snapshot_dir, SNAPSHOT_METADATAS_FILE), 'r') as f:
+            metadatas = json.load(f)
+        offsets = np.load(os.path.join(snapshot_dir, SNAPSHOT_OFFSETS_FILE), mmap_mode='r')
+        embeddings = np.load(os.path.join(snapshot_dir, SNAPSHOT_EMBEDDINGS_FILE), mmap_mode='r')
+        text = np.memmap(os.path.join(snapshot_dir, SNAPSHOT_TEXT_FILE), dtype=np.uint8, mode='r')
+
+        count = header['count']
+        if not (len(ids) == len(metadatas) == len(offsets) - 1 == len(embeddings) == count):
+            raise ValueError(f"Snapshot at {snapshot_dir} is inconsistent: column lengths differ")
+        if embeddings.ndim != 2 or embeddings.shape[1] != header['dimensions']:
+            raise ValueError(
+                f"Snapshot at {snapshot_dir} is inconsistent: embeddings have shape {embeddings.shape}, "
+                f"but the header records {header['dimensions']} dimensions"
+            )
+
+        for metadata in metadatas:
+            for key in ('source', 'source_dir'):
+                if key in metadata:
+                    metadata[key] = _remap_path(metadata[key], path_map)
+            if 'source_paths' in metadata:
+                # Source directory flag keys are derived from the path, so rebuild them
+                citations = [
+                    (_remap_path(d, path_map), _remap_path(p, path_map), page, file_hash)
+                    for d, p, page, file_hash in _citations(metadata)
+                ]
+                for key in [k for k in metadata if k.startswith(SOURCE_DIR_KEY_PREFIX)]:
+                    del metadata[key]
+                _set_citations(metadata, citations)
+
+        os.makedirs(self.persist_directory, exist_ok=True)
+        self.collection = self.chroma_client.get_or_create_collection(
+            name=self.collection_name,
+            embedding_function=self.chroma_embed_function
+        )
+
+        batch_iterator = tqdm(range(0, count, SNAPSHOT_BATCH_SIZE), desc="Importing snapshot", disable=not show_progress)
+        for start in batch_iterator:
+            end = min(start + SNAPSHOT_BATCH_SIZE, count)
+            documents = [
+                text[offsets[i]:offsets[i + 1]].tobytes().decode('utf-8')
+                for i in range(start, end)
+            ]
+            self.collection.upsert(
+                ids=ids[start:end],
+                embeddings=embeddings[start:end].tolist(),
+                documents=documents,
+                metadatas=metadatas[start:end]
+            )
+
+        os.makedirs(DB_STORAGE_DIR, exist_ok=True)
+        with open(self.cache_file, 'a') as f:
+            for line in header['manifest']:
+                parts = line.split(':')
+                if len(parts) == 3:
+                    cached_source_dir, file_path, file_hash = parts
+                    file_path = _remap_path(file_path, path_map)
+                    self.processed_files.add(file_path)
+                    f.write(f"{_remap_path(cached_source_dir, path_map)}:{file_path}:{file_hash}\n")
+
+        self.vector_store = Chroma(
+            client=self.chroma_client,
+            collection_name=self.collection_name,
+            embedding_function=self.embeddings
+        )
+        logger.info(f"Imported {count} chunks from snapshot at {snapshot_dir}")
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) > 2 and sys.argv[1] == 'export':
+        Indexer().export_snapshot(sys.argv[2], show_progress=True)
+    elif len(sys.argv) > 2 and sys.argv[1] == 'import':
+        remaps = dict(arg.split('=', 1) for arg in sys.argv[3:])
+        Indexer().import_snapshot(sys.argv[2], path_map=remaps, show_progress=True)
+    else:
+        print("Usage: python -m src.indexer export <snapshot_dir>")
+        print("       python -m src.indexer import <snapshot_dir> [old_prefix=new_prefix ...]")
@@ -1,14 +1,21 @@
 import ollama
 import logging
-from config import OLLAMA_BASE_URL, OLLAMA_MODEL
+from config import OLLAMA_MODEL
+from src.ollama_pool import get_default_pool
 
 logger = logging.getLogger(__name__)
 
 class LLMInterface:
-    def __init__(self):
-        self.client = ollama.Client(host=OLLAMA_BASE_URL)
+    def __init__(self, pool=None):
+        self.pool = pool or get_default_pool()
+        self.clients = {}
         self.model = OLLAMA_MODEL
 
+    def _client(self, base_url):
+        if base_url not in self.clients:
+            self.clients[base_url] = ollama.Client(host=base_url, timeout=self.pool.timeout)
+        return self.clients[base_url]
+
     def generate_response(self, query, context_chunks):
         logger.info(f"Generating response for query: {query}")
         logger.info(f"Number of context chunks: {len(context_chunks)}")
@@ -52,7 +59,7 @@ class LLMInterface:
         logger.debug(f"User message: {user_message}")
 
         logger.info("Sending request to LLM")
-        response = self.client.chat(model=self.model, messages=messages)
+        response = self.pool.request(lambda url: self._client(url).chat(model=self.model, messages=messages))
         logger.info("Received response from LLM")
         logger.debug(f"LLM raw response: {response}")
         
@@ -0,0 +1,159 @@
+import time
+import logging
+import threading
+import httpx
+import requests
+from config import OLLAMA_BASE_URL
+
+logger = logging.getLogger(__name__)
+
+HEALTH_CHECK_INTERVAL = 30  # Seconds before a failed host is probed again
+HEALTH_CHECK_TIMEOUT = 5
+REQUEST_TIMEOUT = 300
+
+class OllamaHost:
+    def __init__(self, url):
+        self.url = url.rstrip('/')
+        self.healthy = True
+        self.outstanding = 0
+        self.requests = 0
+        self.errors = 0
+        self.completed = 0
+        self.total_latency = 0.0
+        self.last_checked = 0.0
+
+    @property
+    def average_latency(self):
+        return self.total_latency / self.completed if self.completed else 0.0
+
+    def stats(self):
+        return {
+            'url': self.url,
+            'healthy': self.healthy,
+            'outstanding': self.outstanding,
+            'requests': self.requests,
+            'errors': self.errors,
+            'average_latency': self.average_latency,
+        }
+
+def _is_host_failure(error):
+    """True when the error means the host is unreachable or failing, not that the request was bad."""
+    if isinstance(error, (requests.ConnectionError, requests.Timeout, httpx.TransportError)):
+        return True
+    # requests.HTTPError carries the response; ollama.ResponseError carries status_code
+    response = getattr(error, 'response', None)
+    status_code = response.status_code if response is not None else getattr(error, 'status_code', None)
+    return isinstance(status_code, int) and status_code >= 500
+
+class OllamaHostPool:
+    """Routes requests across several Ollama hosts.
+
+    Each request goes to the healthy host with the fewest outstanding
+    requests. A host that is unreachable, times out or answers with a 5xx
+    is marked unhealthy and the request is retried on the next one;
+    unhealthy hosts are probed again once HEALTH_CHECK_INTERVAL has passed.
+    Any other error is raised straight away, since every host would
+    reject the same request.
+    """
+
+    def __init__(self, base_urls=OLLAMA_BASE_URL, timeout=REQUEST_TIMEOUT):
+        if isinstance(base_urls, str):
+            base_urls = base_urls.split(',')
+        self.hosts = [OllamaHost(url.strip()) for url in base_urls if url.strip()]
+        if not self.hosts:
+            raise ValueError("At least one Ollama host must be configured.")
+        self.timeout = timeout
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.hosts)
+
+    def check_health(self, host=None):
+        hosts = [host] if host else self.hosts
+        for h in hosts:
+            try:
+                response = requests.get(f"{h.url}/api/tags", timeout=HEALTH_CHECK_TIMEOUT)
+                response.raise_for_status()
+                healthy = True
+            except requests.RequestException as e:
+                logger.warning(f"Health check failed for Ollama host {h.url}: {str(e)}")
+                healthy = False
+            with self.lock:
+                h.healthy = healthy
+                h.last_checked = time.monotonic()
+        return [h.url for h in self.hosts if h.healthy]
+
+    def _acquire(self, tried):
+        now = time.monotonic()
+        with self.lock:
+            due = [
+                h for h in self.hosts
+                if not h.healthy and h not in tried and now - h.last_checked >= HEALTH_CHECK_INTERVAL
+            ]
+            # Claim the probe so concurrent requests do not all block on the same dead host
+            for h in due:
+                h.last_checked = now
+        for h in due:
+            self.check_health(h)
+
+        with self.lock:
+            candidates = [h for h in self.hosts if h.healthy and h not in tried]
+            if not candidates:
+                # Everything looks down; fall back to hosts we have not tried yet
+                candidates = [h for h in self.hosts if h not in tried]
+            if not candidates:
+                return None
+            host = min(candidates, key=lambda h: (h.outstanding, h.average_latency))
+            host.outstanding += 1
+            host.requests += 1
+            return host
+
+    def request(self, func):
+        """Call func(base_url) on the least loaded host, failing over when a host is down."""
+        tried = []
+        last_error = None
+        while True:
+            host = self._acquire(tried)
+            if host is None:
+                break
+            tried.append(host)
+            start = time.monotonic()
+            try:
+                result = func(host.url)
+            except Exception as e:
+                host_failure = _is_host_failure(e)
+                with self.lock:
+                    host.outstanding -= 1
+                    host.errors += 1
+                    if host_failure:
+                        host.healthy = False
+                        host.last_checked = time.monotonic()
+                if not host_failure:
+                    logger.error(f"Request to Ollama host {host.url} was rejected: {str(e)}")
+                    raise
+                logger.warning(f"Request to Ollama host {host.url} failed: {str(e)}")
+                last_error = e
+                continue
+            with self.lock:
+                host.outstanding -= 1
+                host.completed += 1
+                host.total_latency += time.monotonic() - start
+                host.healthy = True
+            return result
+
+        logger.error("All Ollama hosts failed")
+        raise last_error or RuntimeError("No Ollama hosts available.")
+
+    def stats(self):
+        with self.lock:
+            return [h.stats() for h in self.hosts]
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+def get_default_pool():
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = OllamaHostPool()
+        return _default_pool
@@ -18,7 +18,7 @@ class QueryProcessor:
                 logger.debug(f"Chunk {i+1}:")
                 logger.debug(f"Source: {chunk.metadata.get('source', 'Unknown')}")
                 logger.debug(f"Page: {chunk.metadata.get('page', 'N/A')}")
-                logger.debug(f"Source Directory: {chunk.metadata.get('source_dir', 'Unknown')}")
+                logger.debug(f"Source Directories: {chunk.metadata.get('source_dirs', chunk.metadata.get('source_dir', 'Unknown'))}")
                 logger.debug(f"Content: {chunk.page_content[:100]}...")  # Log first 100 characters
             
             return relevant_chunks
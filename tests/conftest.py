@@ -0,0 +1,37 @@
+import os
+import sys
+import tempfile
+import threading
+import importlib.util
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from tests.helpers import StandInOllama  # noqa: E402
+
+# config.py is a local copy of config-example.py; fall back to the example when it is absent
+try:
+    import config  # noqa: F401
+except ImportError:
+    os.environ.setdefault('DB_STORAGE_DIR', tempfile.mkdtemp())
+    spec = importlib.util.spec_from_file_location('config', os.path.join(ROOT, 'config-example.py'))
+    config = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(config)
+    sys.modules['config'] = config
+
+@pytest.fixture
+def stand_ins():
+    servers = []
+    for _ in range(3):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), StandInOllama)
+        server.hits = 0
+        server.status = 200
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+    yield servers
+    for server in servers:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,50 @@
+import json
+import time
+from http.server import BaseHTTPRequestHandler
+
+from src.chunk_store import ChunkStore
+
+def fake_embedding(text):
+    return [float(len(text)), float(sum(map(ord, text)) % 997)]
+
+def url(server):
+    return f'http://127.0.0.1:{server.server_port}'
+
+class StandInOllama(BaseHTTPRequestHandler):
+    """Answers /api/tags and /api/embeddings like Ollama; server.status forces an error response."""
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.send_response(200)
+        self.end_headers()
+        self.wfile.write(b'{"models": []}')
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self.server.hits += 1
+        time.sleep(0.005)
+        self.send_response(self.server.status)
+        self.end_headers()
+        if self.server.status != 200:
+            self.wfile.write(json.dumps({'error': 'stand-in error'}).encode())
+            return
+        self.wfile.write(json.dumps({'embedding': fake_embedding(body['prompt'])}).encode())
+
+def write(path, *chunks):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text('\n'.join(chunks))
+    return str(path)
+
+def ingest(indexer, source_dir, files):
+    """Mirror DocuChat.setup_rag_system, with one chunk per line of each file."""
+    new_files = indexer.link_duplicate_files(files, source_dir)
+    chunks = ChunkStore()
+    for file_path in new_files:
+        with open(file_path) as f:
+            for page, line in enumerate(f.read().split('\n'), start=1):
+                chunks.append(line, file_path, page)
+    indexer.update_index(chunks, source_dir)
+    indexer.cache_document_hashes(files, source_dir)
+    return new_files
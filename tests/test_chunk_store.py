@@ -0,0 +1,77 @@
+from langchain.schema import Document
+
+from src.chunk_store import ChunkStore
+
+def test_empty_store_is_falsy():
+    store = ChunkStore()
+
+    assert len(store) == 0
+    assert not store
+    assert list(store) == []
+
+def test_documents_round_trip():
+    documents = [
+        Document(page_content='first', metadata={'source': '/docs/a.pdf', 'page': '3'}),
+        Document(page_content='second', metadata={'source': '/docs/b.txt'}),
+        Document(page_content='third', metadata={'source': '/docs/a.pdf', 'page': '4', 'author': 'x', 'rank': 2}),
+    ]
+
+    store = ChunkStore.from_documents(documents)
+
+    assert len(store) == 3
+    assert store
+    assert list(store) == documents
+    assert store.to_document(1) == documents[1]
+
+def test_missing_page_stays_missing():
+    store = ChunkStore()
+    store.append('no page', '/docs/a.txt')
+    store.append('page zero', '/docs/a.txt', 0)
+
+    assert store.page(0) is None
+    assert 'page' not in store.metadata(0)
+    assert store.page(1) == 0
+    assert store.metadata(1)['page'] == '0'
+
+def test_paths_and_source_dirs_are_interned():
+    store = ChunkStore.from_documents(
+        [Document(page_content=str(i), metadata={'source': f'/docs/{i % 2}.pdf'}) for i in range(10)],
+        source_dir='/docs'
+    )
+
+    assert store._strings == ['/docs/0.pdf', '/docs', '/docs/1.pdf']
+    assert [store.source(i) for i in range(3)] == ['/docs/0.pdf', '/docs/1.pdf', '/docs/0.pdf']
+    assert all(store.source_dir(i) == '/docs' for i in range(10))
+    assert store.metadata(0)['source_dir'] == '/docs'
+
+def test_source_dir_in_metadata_wins_over_default():
+    store = ChunkStore.from_documents(
+        [Document(page_content='x', metadata={'source': '/b/x.txt', 'source_dir': '/b'})],
+        source_dir='/a'
+    )
+
+    assert store.source_dir(0) == '/b'
+    assert ChunkStore.from_documents([Document(page_content='x', metadata={'source': '/x'})]).source_dir(0) is None
+
+def test_extra_metadata_is_copied_per_chunk():
+    extra = {'author': 'x'}
+    store = ChunkStore()
+    store.append('with extra', '/docs/a.pdf', 1, extra=extra)
+    store.append('without extra', '/docs/a.pdf', 2)
+    extra['author'] = 'changed'
+
+    assert store.metadata(0) == {'author': 'x', 'source': '/docs/a.pdf', 'page': '1'}
+    assert store.metadata(1) == {'source': '/docs/a.pdf', 'page': '2'}
+
+    # Metadata is built fresh, so callers can edit it without touching the store
+    store.metadata(0)['author'] = 'edited'
+    assert store.metadata(0)['author'] == 'x'
+
+def test_non_ascii_text_keeps_chunk_boundaries():
+    texts = ['Größe', '', '日本語のテキスト', 'emoji 🎉 ok', 'plain']
+    store = ChunkStore()
+    for text in texts:
+        store.append(text, '/docs/ü.txt')
+
+    assert [store.text(i) for i in range(len(texts))] == texts
+    assert store.source(0) == '/docs/ü.txt'
@@ -0,0 +1,83 @@
+import os
+
+import pytest
+
+import src.indexer
+from src.indexer import Indexer
+from src.ollama_pool import OllamaHostPool
+from tests.helpers import ingest, url, write
+
+DISCLAIMER = 'DISCLAIMER: this document is provided as is.'
+
+@pytest.fixture
+def indexer(stand_ins, tmp_path, monkeypatch):
+    monkeypatch.setattr(src.indexer, 'DB_STORAGE_DIR', str(tmp_path / 'db'))
+    (tmp_path / 'db').mkdir()
+    return Indexer(pool=OllamaHostPool([url(s) for s in stand_ins]))
+
+def search_sources(indexer, source_dir):
+    return sorted((d.page_content, d.metadata['source']) for d in indexer.search('x', source_dir, k=10))
+
+def test_copied_file_is_linked_with_shared_chunks(indexer, stand_ins, tmp_path):
+    dir_a, dir_b = str(tmp_path / 'A'), str(tmp_path / 'B')
+    a_f1 = write(tmp_path / 'A' / 'f1.txt', 'alpha one', DISCLAIMER)
+    a_f2 = write(tmp_path / 'A' / 'f2.txt', 'beta one', 'beta two', DISCLAIMER)
+    b_f2 = write(tmp_path / 'B' / 'f2.txt', 'beta one', 'beta two', DISCLAIMER)
+
+    ingest(indexer, dir_a, [a_f1, a_f2])
+    embedded = sum(s.hits for s in stand_ins)
+
+    assert ingest(indexer, dir_b, [b_f2]) == []
+    assert sum(s.hits for s in stand_ins) == embedded
+    assert indexer.collection.count() == 4
+
+    results = search_sources(indexer, dir_b)
+    assert [text for text, _ in results] == sorted([DISCLAIMER, 'beta one', 'beta two'])
+    assert all(source == b_f2 for _, source in results)
+
+    results = dict(search_sources(indexer, dir_a))
+    assert results['beta one'] == a_f2 and results['alpha one'] == a_f1
+
+def test_files_are_cached_only_after_chunks_are_added(indexer, tmp_path, monkeypatch):
+    dir_a = str(tmp_path / 'A')
+    a_f1 = write(tmp_path / 'A' / 'f1.txt', 'alpha one', 'alpha two')
+
+    def failing_add(*args, **kwargs):
+        raise RuntimeError('no hosts')
+
+    indexer.collection = indexer.chroma_client.get_or_create_collection(
+        name=indexer.collection_name,
+        embedding_function=indexer.chroma_embed_function
+    )
+    monkeypatch.setattr(indexer, '_add_chunks_to_collection', failing_add)
+    with pytest.raises(RuntimeError, match='no hosts'):
+        ingest(indexer, dir_a, [a_f1])
+
+    assert a_f1 not in indexer.processed_files
+    assert indexer.check_for_changes([a_f1], dir_a)
+
+def test_shared_chunk_cites_page_of_file_in_selected_source(indexer, tmp_path):
+    dir_a, dir_b = str(tmp_path / 'A'), str(tmp_path / 'B')
+    a_f1 = write(tmp_path / 'A' / 'f1.txt', 'alpha one', DISCLAIMER)
+    b_f2 = write(tmp_path / 'B' / 'f2.txt', *[f'beta {n}' for n in range(1, 7)], DISCLAIMER)
+
+    ingest(indexer, dir_a, [a_f1])
+    ingest(indexer, dir_b, [b_f2])
+
+    cited = {d.page_content: d.metadata for d in indexer.search('x', dir_b, k=10)}
+    assert (cited[DISCLAIMER]['source'], cited[DISCLAIMER]['page']) == (b_f2, '7')
+    cited = {d.page_content: d.metadata for d in indexer.search('x', dir_a, k=10)}
+    assert (cited[DISCLAIMER]['source'], cited[DISCLAIMER]['page']) == (a_f1, '2')
+
+def test_shared_chunk_records_every_file_in_a_source(indexer, tmp_path):
+    dir_a = str(tmp_path / 'A')
+    a_f1 = write(tmp_path / 'A' / 'f1.txt', 'alpha one', DISCLAIMER)
+    a_f3 = write(tmp_path / 'A' / 'f3.txt', 'gamma one', 'gamma two', DISCLAIMER)
+
+    ingest(indexer, dir_a, [a_f1, a_f3])
+
+    stored = indexer.collection.get(where={'source': a_f1}, include=['documents', 'metadatas'])
+    metadata = stored['metadatas'][stored['documents'].index(DISCLAIMER)]
+    assert metadata['source_paths'].split(os.pathsep) == [a_f1, a_f3]
+    assert metadata['source_pages'].split(os.pathsep) == ['2', '3']
+    assert metadata['source_dirs'] == dir_a
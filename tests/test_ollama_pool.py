@@ -0,0 +1,103 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+import src.indexer
+from src.indexer import Indexer, OllamaEmbeddings
+from src.ollama_pool import OllamaHostPool
+from tests.helpers import fake_embedding, url
+
+# Nothing listens on port 1, so requests to it fail immediately
+DEAD_HOST = 'http://127.0.0.1:1'
+
+def test_embeddings_are_spread_across_hosts(stand_ins):
+    pool = OllamaHostPool([url(s) for s in stand_ins])
+    texts = [f'chunk {i}' for i in range(200)]
+
+    embeddings = OllamaEmbeddings(pool).embed_documents(texts)
+
+    assert embeddings == [fake_embedding(t) for t in texts]
+    assert sum(s.hits for s in stand_ins) == len(texts)
+    assert all(s.hits > 0 for s in stand_ins)
+    assert all(stats['errors'] == 0 and stats['outstanding'] == 0 for stats in pool.stats())
+
+def test_failed_host_fails_over_and_is_marked_unhealthy(stand_ins):
+    pool = OllamaHostPool([DEAD_HOST, url(stand_ins[0])])
+
+    assert OllamaEmbeddings(pool).embed_query('hello') == fake_embedding('hello')
+
+    dead, live = pool.stats()
+    assert dead['errors'] == 1 and not dead['healthy']
+    assert live['errors'] == 0 and live['healthy']
+
+def test_health_check_reports_only_live_hosts(stand_ins):
+    pool = OllamaHostPool(f'{DEAD_HOST},{url(stand_ins[0])},{url(stand_ins[1])}')
+
+    assert pool.check_health() == [url(stand_ins[0]), url(stand_ins[1])]
+
+def test_unhealthy_host_is_probed_by_one_request_only(stand_ins):
+    pool = OllamaHostPool([DEAD_HOST, url(stand_ins[0])])
+    pool.hosts[0].healthy = False
+    probes = []
+    check_health = pool.check_health
+
+    def slow_check_health(host=None):
+        probes.append(host)
+        time.sleep(0.2)
+        return check_health(host)
+
+    pool.check_health = slow_check_health
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda _: pool.request(lambda base_url: base_url), range(8)))
+
+    assert probes == [pool.hosts[0]]
+
+def test_all_hosts_failing_raises():
+    pool = OllamaHostPool([DEAD_HOST])
+
+    with pytest.raises(requests.ConnectionError):
+        OllamaEmbeddings(pool).embed_query('hello')
+
+def test_server_error_fails_over(stand_ins):
+    stand_ins[0].status = 500
+    pool = OllamaHostPool([url(stand_ins[0]), url(stand_ins[1])])
+
+    assert OllamaEmbeddings(pool).embed_query('hello') == fake_embedding('hello')
+
+    failed, live = pool.stats()
+    assert failed['errors'] == 1 and not failed['healthy']
+    assert live['errors'] == 0 and live['healthy']
+
+def test_rejected_request_is_not_retried_on_other_hosts(stand_ins):
+    for server in stand_ins:
+        server.status = 404
+    pool = OllamaHostPool([url(s) for s in stand_ins])
+
+    with pytest.raises(requests.HTTPError):
+        OllamaEmbeddings(pool).embed_query('hello')
+
+    assert sum(s.hits for s in stand_ins) == 1
+    assert sum(stats['errors'] for stats in pool.stats()) == 1
+    assert all(stats['healthy'] for stats in pool.stats())
+
+def test_average_latency_ignores_requests_in_flight(stand_ins):
+    pool = OllamaHostPool([url(stand_ins[0])])
+    host = pool.hosts[0]
+    pool.request(lambda base_url: time.sleep(0.05))
+    latency = host.average_latency
+
+    # A request that has been routed but not finished must not dilute the average
+    assert pool._acquire([]) is host
+    assert host.average_latency == latency
+    assert host.completed == 1
+
+def test_indexer_embeds_through_given_pool(stand_ins, tmp_path, monkeypatch):
+    monkeypatch.setattr(src.indexer, 'DB_STORAGE_DIR', str(tmp_path))
+    pool = OllamaHostPool([url(s) for s in stand_ins])
+
+    indexer = Indexer(pool=pool)
+
+    assert indexer.embeddings.pool is pool
+    assert indexer.chroma_embed_function(['a', 'bb']) == [fake_embedding('a'), fake_embedding('bb')]
@@ -0,0 +1,104 @@
+import os
+import json
+
+import pytest
+
+import src.indexer
+from src.indexer import Indexer, SNAPSHOT_HEADER_FILE, SNAPSHOT_TEXT_FILE, SNAPSHOT_EMBEDDINGS_FILE
+from src.ollama_pool import OllamaHostPool
+from tests.helpers import ingest, url, write
+
+NEW_ROOT = '/mnt/docs'
+
+@pytest.fixture
+def pool(stand_ins):
+    return OllamaHostPool([url(s) for s in stand_ins])
+
+def make_indexer(pool, db_dir, monkeypatch):
+    os.makedirs(db_dir, exist_ok=True)
+    monkeypatch.setattr(src.indexer, 'DB_STORAGE_DIR', str(db_dir))
+    return Indexer(pool=pool)
+
+@pytest.fixture
+def snapshot(pool, tmp_path, monkeypatch):
+    """Index a file shared by two sources plus one unique file, then export."""
+    docs = tmp_path / 'docs'
+    indexer = make_indexer(pool, tmp_path / 'db', monkeypatch)
+    ingest(indexer, str(docs / 'A'), [write(docs / 'A' / 'shared.txt', 'shared one', 'shared two')])
+    ingest(indexer, str(docs / 'B'), [
+        write(docs / 'B' / 'shared.txt', 'shared one', 'shared two'),
+        write(docs / 'B' / 'own.txt', 'only in b'),
+    ])
+    snapshot_dir = str(tmp_path / 'snapshot')
+    indexer.export_snapshot(snapshot_dir)
+    return snapshot_dir, str(docs)
+
+def edit_header(snapshot_dir, edit):
+    path = os.path.join(snapshot_dir, SNAPSHOT_HEADER_FILE)
+    with open(path) as f:
+        header = json.load(f)
+    edit(header)
+    with open(path, 'w') as f:
+        json.dump(header, f)
+
+def test_round_trip_remaps_paths_without_embedding(snapshot, pool, stand_ins, tmp_path, monkeypatch):
+    snapshot_dir, old_root = snapshot
+    indexer = make_indexer(pool, tmp_path / 'db2', monkeypatch)
+    hits = sum(s.hits for s in stand_ins)
+
+    indexer.import_snapshot(snapshot_dir, path_map={old_root: NEW_ROOT})
+
+    assert sum(s.hits for s in stand_ins) == hits
+    assert indexer.collection.count() == 3
+
+    stored = indexer.collection.get(include=['metadatas'])
+    shared = [m for m in stored['metadatas'] if m['source_dirs'].count(os.pathsep) == 1]
+    assert len(shared) == 2
+    for metadata in stored['metadatas']:
+        assert metadata['source'].startswith(NEW_ROOT)
+        assert metadata['source_dir'].startswith(NEW_ROOT)
+        assert all(p.startswith(NEW_ROOT) for p in metadata['source_paths'].split(os.pathsep))
+    assert shared[0]['source_dirs'] == os.pathsep.join([f'{NEW_ROOT}/A', f'{NEW_ROOT}/B'])
+    assert shared[0]['source_paths'] == os.pathsep.join([f'{NEW_ROOT}/A/shared.txt', f'{NEW_ROOT}/B/shared.txt'])
+    assert sorted(m['source_pages'] for m in shared) == [os.pathsep.join(['1', '1']), os.pathsep.join(['2', '2'])]
+
+    with open(indexer.cache_file) as f:
+        manifest = [line.strip() for line in f]
+    assert manifest and all(line.startswith(NEW_ROOT) for line in manifest)
+    assert f'{NEW_ROOT}/B/own.txt' in indexer.processed_files
+
+    results = indexer.search('x', f'{NEW_ROOT}/B', k=5)
+    assert sorted(d.metadata['source'] for d in results) == [
+        f'{NEW_ROOT}/B/own.txt', f'{NEW_ROOT}/B/shared.txt', f'{NEW_ROOT}/B/shared.txt'
+    ]
+    results = indexer.search('x', f'{NEW_ROOT}/A', k=5)
+    assert sorted(d.metadata['source'] for d in results) == [f'{NEW_ROOT}/A/shared.txt'] * 2
+
+def test_tampered_data_file_is_rejected(snapshot, pool, tmp_path, monkeypatch):
+    snapshot_dir, _ = snapshot
+    with open(os.path.join(snapshot_dir, SNAPSHOT_TEXT_FILE), 'r+b') as f:
+        f.write(b'X')
+
+    with pytest.raises(ValueError, match='Checksum mismatch'):
+        make_indexer(pool, tmp_path / 'db2', monkeypatch).import_snapshot(snapshot_dir)
+
+def test_missing_checksum_is_rejected(snapshot, pool, tmp_path, monkeypatch):
+    snapshot_dir, _ = snapshot
+    edit_header(snapshot_dir, lambda header: header['checksums'].pop(SNAPSHOT_EMBEDDINGS_FILE))
+
+    with pytest.raises(ValueError, match='no checksum for: embeddings.npy'):
+        make_indexer(pool, tmp_path / 'db2', monkeypatch).import_snapshot(snapshot_dir)
+
+def test_other_embed_model_is_rejected(snapshot, pool, tmp_path, monkeypatch):
+    snapshot_dir, _ = snapshot
+    edit_header(snapshot_dir, lambda header: header.update(embed_model='some-other-model'))
+
+    with pytest.raises(ValueError, match='some-other-model'):
+        make_indexer(pool, tmp_path / 'db2', monkeypatch).import_snapshot(snapshot_dir)
+
+def test_mismatched_dimensions_are_rejected(snapshot, pool, tmp_path, monkeypatch):
+    snapshot_dir, _ = snapshot
+    edit_header(snapshot_dir, lambda header: header.update(dimensions=header['dimensions'] + 1))
+
+    with pytest.raises(ValueError, match='dimensions'):
+        make_indexer(pool, tmp_path / 'db2', monkeypatch).import_snapshot(snapshot_dir)